@@ -34,6 +34,15 @@ class Settings(BaseSettings):
         default="http://localhost:8000", description="Public URL of the webhook server"
     )
     server_port: int = Field(default=8000, description="Server port")
+    workers: int = Field(
+        default=1,
+        description="Uvicorn worker processes. Each worker runs its own scheduler, "
+        "so use more than 1 only with ENABLE_SCHEDULER=false",
+    )
+    enable_scheduler: bool = Field(
+        default=True,
+        description="Run the daily generation scheduler inside the server process",
+    )
     secret_key: str = Field(
         default="change-this-to-a-random-string",
         description="Secret for signing approval tokens",
@@ -5,16 +5,35 @@ Set DATABASE_URL in .env to use Postgres:
 
 Leave DATABASE_URL empty to use local SQLite (data/posts.db).
 """
-from dotenv import load_dotenv
-load_dotenv()
-import os
+from contextlib import contextmanager
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from pathlib import Path
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, select
+from sqlalchemy import (
+    create_engine,
+    event,
+    inspect,
+    text,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    JSON,
+    String,
+    Text,
+    and_,
+    func,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from .config import get_settings
+from .tokens import new_post_token, verify_post_token
+
 # ─── Post Status Enum ────────────────────────────────────────────────────────
 
 
@@ -34,22 +53,62 @@ Base = declarative_base()
 
 def _get_engine():
     """Create an engine based on DATABASE_URL (Postgres) or fallback to SQLite."""
-    database_url = os.environ.get("DATABASE_URL", "")
+    database_url = get_settings().database_url
 
     if database_url:
         # Neon/Railway sometimes give postgres:// but SQLAlchemy needs postgresql://
         if database_url.startswith("postgres://"):
             database_url = database_url.replace("postgres://", "postgresql://", 1)
-        return create_engine(database_url, pool_pre_ping=True)
+        # Headroom over the default 5+10 for bursts of approval clicks; LIFO
+        # keeps the few connections a low-traffic app needs warm, and
+        # recycling stays under Neon's idle-connection timeout.
+        return create_engine(
+            database_url,
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            pool_recycle=1800,
+            pool_use_lifo=True,
+        )
     else:
-        # Local SQLite
+        # Local SQLite: keep the default pool so connections (and the pragmas
+        # set on them below) are reused instead of reopened on every session
         db_path = Path(__file__).parent.parent / "data" / "posts.db"
         db_path.parent.mkdir(parents=True, exist_ok=True)
-        return create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        sqlite_engine = create_engine(
+            f"sqlite:///{db_path}",
+            connect_args={"check_same_thread": False},
+        )
+
+        @event.listens_for(sqlite_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            # WAL lets readers proceed during a write; NORMAL sync is safe with WAL
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        return sqlite_engine
 
 
 engine = _get_engine()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+
+@contextmanager
+def session_scope():
+    """Provide a transactional scope: commit on success, roll back on error."""
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 
 # ─── SQLAlchemy Model ────────────────────────────────────────────────────────
@@ -57,9 +116,14 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Covers created_at range scans and ordering, and lets the recent
+        # theme lookup run as an index-only scan.
+        Index("ix_posts_created_theme", "created_at", "theme_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    theme_id = Column(String, nullable=False)
+    theme_id = Column(String, nullable=False, index=True)
     theme = Column(String, nullable=False)
     hook = Column(Text, nullable=False)
     caption = Column(Text, nullable=False)
@@ -68,17 +132,56 @@ class Post(Base):
     image_prompt = Column(Text, default="")
     cta = Column(Text, default="")
     status = Column(String, nullable=False, default="draft")
-    approval_token = Column(String, unique=True)
-    created_at = Column(String, nullable=False)
-    approved_at = Column(String, nullable=True)
-    published_at = Column(String, nullable=True)
+    approval_token = Column(String, unique=True, index=True)
+    # Timestamps come from the database clock. The client-side default puts
+    # now() into the INSERT itself, so tables created before server_default
+    # existed still get a value.
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, default=func.now(), server_default=func.now()
+    )
+    approved_at = Column(DateTime(timezone=True), nullable=True)
+    published_at = Column(DateTime(timezone=True), nullable=True)
     instagram_post_id = Column(String, nullable=True)
     rejection_reason = Column(Text, nullable=True)
-    metadata_ = Column("metadata", Text, default="{}")
+    metadata_ = Column("metadata", JSON().with_variant(JSONB(), "postgresql"), default=dict)
+
+
+_TIMESTAMP_COLUMNS = ("created_at", "approved_at", "published_at")
+
+
+def _upgrade_legacy_columns():
+    """Convert timestamp and metadata columns stored as text by older versions."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            column_types = {c["name"]: c["type"] for c in inspect(conn).get_columns("posts")}
+            for name in _TIMESTAMP_COLUMNS:
+                if not isinstance(column_types[name], DateTime):
+                    conn.execute(text(
+                        f"ALTER TABLE posts ALTER COLUMN {name} "
+                        f"TYPE TIMESTAMP WITH TIME ZONE USING {name}::timestamptz"
+                    ))
+            if not isinstance(column_types["metadata"], JSON):
+                conn.execute(text(
+                    "ALTER TABLE posts ALTER COLUMN metadata TYPE JSONB USING metadata::jsonb"
+                ))
+        elif engine.dialect.name == "sqlite":
+            # SQLite has no column types to alter; rewrite the values into the
+            # format SQLAlchemy's DateTime stores (all legacy values are UTC).
+            # Metadata was already stored as JSON text, which JSON reads as-is.
+            for name in _TIMESTAMP_COLUMNS:
+                conn.execute(text(
+                    f"UPDATE posts SET {name} = replace(substr({name}, 1, 19), 'T', ' ') "
+                    f"WHERE substr({name}, 11, 1) = 'T'"
+                ))
 
 
 # Create tables on import
 Base.metadata.create_all(bind=engine)
+_upgrade_legacy_columns()
+
+# create_all skips indexes on tables that already exist, so add any missing ones
+for _index in Post.__table__.indexes:
+    _index.create(bind=engine, checkfirst=True)
 
 
 # ─── FastAPI Dependency ──────────────────────────────────────────────────────
@@ -110,15 +213,23 @@ def _post_to_dict(post: Post) -> dict:
         "cta": post.cta,
         "status": post.status,
         "approval_token": post.approval_token,
-        "created_at": post.created_at,
-        "approved_at": post.approved_at,
-        "published_at": post.published_at,
+        "created_at": post.created_at.isoformat() if post.created_at else None,
+        "approved_at": post.approved_at.isoformat() if post.approved_at else None,
+        "published_at": post.published_at.isoformat() if post.published_at else None,
         "instagram_post_id": post.instagram_post_id,
         "rejection_reason": post.rejection_reason,
         "metadata": post.metadata_,
     }
 
 
+def _token_filter(token: str):
+    """Match signed tokens by primary key, falling back to the stored token."""
+    post_id = verify_post_token(token)
+    if post_id is not None:
+        return Post.id == post_id
+    return Post.approval_token == token
+
+
 # ─── CRUD Operations ────────────────────────────────────────────────────────
 
 
@@ -131,12 +242,15 @@ def create_post(
     alt_text: str = "",
     image_prompt: str = "",
     cta: str = "",
-    approval_token: str = "",
-    metadata: str = "{}",
-) -> int:
-    """Insert a new post and return its ID."""
-    db = SessionLocal()
-    try:
+    approval_token: str | None = None,
+    metadata: dict | None = None,
+) -> tuple[int, str]:
+    """Insert a new post and return its (ID, approval token).
+
+    Without an explicit approval_token, the post is given one from
+    tokens.new_post_token once its ID is known.
+    """
+    with session_scope() as db:
         post = Post(
             theme_id=theme_id,
             theme=theme,
@@ -148,33 +262,36 @@ def create_post(
             cta=cta,
             status=PostStatus.PENDING_APPROVAL,
             approval_token=approval_token,
-            created_at=datetime.now(timezone.utc).isoformat(),
-            metadata_=metadata,
+            metadata_=metadata or {},
         )
         db.add(post)
-        db.commit()
-        db.refresh(post)
-        return post.id
-    finally:
-        db.close()
+        # The flush fills the primary key (RETURNING on Postgres, lastrowid on
+        # SQLite), so no refresh SELECT is needed.
+        db.flush()
+        if not approval_token:
+            post.approval_token = new_post_token(post.id)
+        return post.id, post.approval_token
 
 
 def get_post(post_id: int) -> dict | None:
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         post = db.execute(select(Post).filter(Post.id == post_id)).scalar_one_or_none()
         return _post_to_dict(post) if post else None
-    finally:
-        db.close()
 
 
 def get_post_by_token(token: str) -> dict | None:
-    db = SessionLocal()
-    try:
-        post = db.execute(select(Post).filter(Post.approval_token == token)).scalar_one_or_none()
+    with session_scope() as db:
+        post = db.execute(select(Post).filter(_token_filter(token))).scalar_one_or_none()
         return _post_to_dict(post) if post else None
-    finally:
-        db.close()
+
+
+def get_post_status_by_token(token: str) -> tuple[int, str, str] | None:
+    """Return only (id, status, theme) for a token, skipping the large text columns."""
+    with session_scope() as db:
+        row = db.execute(
+            select(Post.id, Post.status, Post.theme).filter(_token_filter(token))
+        ).one_or_none()
+        return tuple(row) if row else None
 
 
 def update_post_status(
@@ -182,58 +299,93 @@ def update_post_status(
     status: PostStatus,
     rejection_reason: str | None = None,
     instagram_post_id: str | None = None,
-):
-    db = SessionLocal()
-    try:
-        post = db.execute(select(Post).filter(Post.id == post_id)).scalar_one_or_none()
-        if not post:
-            return
+    from_statuses: tuple[PostStatus, ...] | None = None,
+) -> int:
+    """Set a post's status and return the number of rows changed.
 
-        now = datetime.now(timezone.utc).isoformat()
-        post.status = status
+    With ``from_statuses`` the write only happens if the post is currently in
+    one of those states, so check-and-set is a single atomic statement and a
+    return value of 0 means another request got there first.
+    """
+    values = {"status": status}
 
-        if status == PostStatus.APPROVED:
-            post.approved_at = now
-        elif status == PostStatus.PUBLISHED:
-            post.published_at = now
-            post.instagram_post_id = instagram_post_id
-        elif status == PostStatus.REJECTED:
-            post.rejection_reason = rejection_reason
+    if status == PostStatus.APPROVED:
+        values["approved_at"] = func.now()
+    elif status == PostStatus.PUBLISHED:
+        values["published_at"] = func.now()
+        values["instagram_post_id"] = instagram_post_id
+    elif status == PostStatus.REJECTED:
+        values["rejection_reason"] = rejection_reason
 
-        db.commit()
-    finally:
-        db.close()
+    stmt = update(Post).where(Post.id == post_id)
+    if from_statuses is not None:
+        stmt = stmt.where(Post.status.in_(from_statuses))
 
-
-def update_post_metadata(post_id: int, metadata: str):
-    db = SessionLocal()
-    try:
-        post = db.execute(select(Post).filter(Post.id == post_id)).scalar_one_or_none()
-        if post:
-            post.metadata_ = metadata
-            db.commit()
-    finally:
-        db.close()
+    # One UPDATE statement; no need to load the row first
+    with session_scope() as db:
+        return db.execute(stmt.values(**values)).rowcount
 
 
-def get_recent_posts(limit: int = 20) -> list[dict]:
-    db = SessionLocal()
-    try:
-        posts = db.execute(
-            select(Post).order_by(Post.created_at.desc()).limit(limit)
-        ).scalars().all()
-        return [_post_to_dict(p) for p in posts]
-    finally:
-        db.close()
+def claim_post_approval(
+    post_id: int,
+    from_statuses: tuple[PostStatus, ...],
+    stale_after: timedelta,
+) -> bool:
+    """Atomically move a post to approved; return whether this call did it.
+
+    Besides ``from_statuses``, a post that has sat in approved for longer than
+    ``stale_after`` can be claimed again, so an approval whose publish task
+    died (e.g. in a restart) doesn't leave the post stuck.
+    """
+    cutoff = datetime.now(timezone.utc) - stale_after
+    stmt = (
+        update(Post)
+        .where(
+            Post.id == post_id,
+            or_(
+                Post.status.in_(from_statuses),
+                and_(Post.status == PostStatus.APPROVED, Post.approved_at < cutoff),
+            ),
+        )
+        .values(status=PostStatus.APPROVED, approved_at=func.now())
+    )
+    with session_scope() as db:
+        return db.execute(stmt).rowcount == 1
+
+
+def update_post_metadata(post_id: int, metadata: dict):
+    with session_scope() as db:
+        db.execute(update(Post).where(Post.id == post_id).values(metadata_=metadata))
+
+
+def get_recent_posts(limit: int = 20) -> list[tuple]:
+    """Return dashboard rows, newest first.
+
+    Each row is (id, status, theme, hook, cost_inr, created_at, approval_token).
+    cost_inr is extracted from the metadata JSON by the database, so no
+    per-row dict is decoded.
+    """
+    with session_scope() as db:
+        return db.execute(
+            select(
+                Post.id,
+                Post.status,
+                Post.theme,
+                Post.hook,
+                Post.metadata_["cost_inr"].as_float(),
+                Post.created_at,
+                Post.approval_token,
+            )
+            # created_at only has second resolution on SQLite; id breaks ties
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(limit)
+        ).all()
 
 
 def get_used_theme_ids(days: int = 30) -> list[str]:
-    db = SessionLocal()
-    try:
-        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    with session_scope() as db:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
         posts = db.execute(
-            select(Post.theme_id).filter(Post.created_at >= cutoff).distinct()
+            select(Post.theme_id).where(Post.created_at >= cutoff).distinct()
         ).scalars().all()
         return list(posts)
-    finally:
-        db.close()
\ No newline at end of file
@@ -1,14 +1,30 @@
 """Email service for sending approval emails to Nitesh."""
 
+from functools import lru_cache
 from pathlib import Path
 
 import resend
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader
 
 from .config import get_settings
 
 TEMPLATE_PATH = Path(__file__).parent.parent / "templates" / "approval_email.html"
 
+# Templates are parsed and compiled once; auto_reload is off since they only
+# change on deploy.
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_PATH.parent),
+    auto_reload=False,
+    cache_size=400,
+)
+_approval_template = _env.get_template(TEMPLATE_PATH.name)
+
+
+@lru_cache(maxsize=1)
+def _configure_resend() -> None:
+    """Set the Resend API key once per process."""
+    resend.api_key = get_settings().resend_api_key
+
 
 def send_approval_email(post_data: dict) -> str:
     """
@@ -21,7 +37,7 @@ def send_approval_email(post_data: dict) -> str:
         The Resend email ID
     """
     settings = get_settings()
-    resend.api_key = settings.resend_api_key
+    _configure_resend()
 
     # Build approval/reject URLs
     base = settings.server_base_url.rstrip("/")
@@ -33,9 +49,7 @@ def send_approval_email(post_data: dict) -> str:
 
 
     # Render the email template
-    template_str = TEMPLATE_PATH.read_text()
-    template = Template(template_str)
-    html_body = template.render(
+    html_body = _approval_template.render(
         hook=post_data.get("hook", ""),
         caption=post_data.get("caption", ""),
         hashtags=post_data.get("hashtags", ""),
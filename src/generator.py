@@ -1,12 +1,12 @@
 """Content generator using Claude API to create posts in Nitesh's voice."""
 
-import json
 import random
-import secrets
+from functools import lru_cache
 from pathlib import Path
 
 import anthropic
-from anthropic.types import MessageParam
+import orjson
+from anthropic.types import CacheControlEphemeralParam, MessageParam, TextBlockParam
 
 from .config import get_settings
 from .style_guide import NITESH_STYLE_SYSTEM_PROMPT, CONTENT_GENERATION_PROMPT
@@ -15,18 +15,68 @@ from .database import create_post, get_used_theme_ids
 
 THEMES_PATH = Path(__file__).parent.parent / "config" / "content_themes.json"
 
+# Forcing this tool makes Claude return the post as structured input rather
+# than free text, so there are no code fences or JSON decoding to handle.
+_POST_TOOL = {
+    "name": "emit_post",
+    "description": "Return the generated Instagram post.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "hook": {"type": "string", "description": "Attention-grabbing first line"},
+            "caption": {"type": "string", "description": "Full caption, starting with the hook"},
+            "hashtags": {"type": "string", "description": "Space-separated hashtags"},
+            "alt_text": {"type": "string", "description": "Image description for accessibility"},
+            "image_prompt": {"type": "string", "description": "Description of a complementary image"},
+            "theme": {"type": "string", "description": "The mindfulness theme this post addresses"},
+            "cta": {"type": "string", "description": "Call-to-action or reflection question"},
+        },
+        "required": ["hook", "caption", "hashtags", "alt_text", "image_prompt", "cta"],
+    },
+}
+
+
+# Built once so every request reuses the same system block. The cache marker
+# lets the API reuse the tool schema + style prompt prefix between calls
+# (only kicks in once that prefix is past the model's ~1024-token minimum).
+_SYSTEM_BLOCKS = [
+    TextBlockParam(
+        type="text",
+        text=NITESH_STYLE_SYSTEM_PROMPT,
+        cache_control=CacheControlEphemeralParam(type="ephemeral"),
+    )
+]
+
+
+@lru_cache(maxsize=1)
+def load_themes() -> tuple[dict, ...]:
+    """Load content themes from the configuration (parsed once per process).
+
+    Call ``load_themes.cache_clear()`` to pick up edits to the JSON file.
+    """
+    data = orjson.loads(THEMES_PATH.read_bytes())
+    return tuple(data["themes"])
+
 
-def load_themes() -> list[dict]:
-    """Load content themes from the configuration."""
-    with open(THEMES_PATH) as f:
-        data = json.load(f)
-    return data["themes"]
+@lru_cache(maxsize=1)
+def _get_anthropic_client() -> anthropic.Anthropic:
+    """Get a cached Anthropic client so its HTTP connection pool is reused.
+
+    Retries and timeouts are bounded so a network blip can't hang the
+    scheduler thread for minutes.
+    """
+    settings = get_settings()
+    return anthropic.Anthropic(
+        api_key=settings.anthropic_api_key,
+        max_retries=2,
+        timeout=anthropic.Timeout(60.0, connect=5.0),
+    )
 
 
 def pick_theme() -> dict:
     """Pick a theme that hasn't been used recently."""
     themes = load_themes()
-    used_ids = get_used_theme_ids(days=14)  # Avoid repeating within 2 weeks
+    used_ids = set(get_used_theme_ids(days=14))  # Avoid repeating within 2 weeks
 
     available = [t for t in themes if t["id"] not in used_ids]
     if not available:
@@ -48,8 +98,7 @@ def generate_post(
     If revision_of and feedback are provided, Claude will improve the original post.
     Returns the post-data dict with all fields, plus the database post_id.
     """
-    settings = get_settings()
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+    client = _get_anthropic_client()
 
     if theme is None:
         if force_theme_id:
@@ -82,42 +131,57 @@ CTA: {revision_of.get('cta', '')}
 FEEDBACK FROM REVIEWER:
 "{feedback}"
 
-Please generate a completely revised version that addresses this feedback while keeping the same theme. Keep the same JSON format.
+Please generate a completely revised version that addresses this feedback while keeping the same theme. Return it with the emit_post tool as before.
 """
 
-    response = client.messages.create(
+    # Streamed so events keep arriving during a long generation and the 60s
+    # read timeout doesn't fire; get_final_message() still waits for the end
+    with client.messages.stream(
         model="claude-sonnet-4-5-20250929",
         max_tokens=1500,
-        system=NITESH_STYLE_SYSTEM_PROMPT,
+        system=_SYSTEM_BLOCKS,
         messages=[MessageParam(role="user", content=prompt)],
-    )
+        tools=[_POST_TOOL],
+        tool_choice={"type": "tool", "name": _POST_TOOL["name"]},
+    ) as stream:
+        response = stream.get_final_message()
 
     # Track token usage and cost
     input_tokens = response.usage.input_tokens
     output_tokens = response.usage.output_tokens
-    cost_usd = (input_tokens * 3 / 1_000_000) + (output_tokens * 15 / 1_000_000)
+    cache_write_tokens = response.usage.cache_creation_input_tokens or 0
+    cache_read_tokens = response.usage.cache_read_input_tokens or 0
+    # Cache writes bill at 1.25x the input rate, cache reads at 0.1x
+    cost_usd = (
+        input_tokens * 3
+        + cache_write_tokens * 3.75
+        + cache_read_tokens * 0.3
+        + output_tokens * 15
+    ) / 1_000_000
     cost_inr = cost_usd * 85
 
     usage_info = {
         "input_tokens": input_tokens,
         "output_tokens": output_tokens,
+        "cache_write_tokens": cache_write_tokens,
+        "cache_read_tokens": cache_read_tokens,
         "cost_usd": round(cost_usd, 6),
         "cost_inr": round(cost_inr, 4),
         "model": "claude-sonnet-4-5-20250929",
     }
-    print(f"💰 Cost: ${cost_usd:.6f} (₹{cost_inr:.4f}) | Tokens: {input_tokens} in / {output_tokens} out")
-
-    raw_text = response.content[0].text.strip()
-    if raw_text.startswith("```"):
-        raw_text = raw_text.split("\n", 1)[1]
-        if raw_text.endswith("```"):
-            raw_text = raw_text[:-3].strip()
-
-    post_data = json.loads(raw_text)
-
-    approval_token = secrets.token_urlsafe(32)
-
-    post_id = create_post(
+    print(f"💰 Cost: ${cost_usd:.6f} (₹{cost_inr:.4f}) | Tokens: {input_tokens} in / {output_tokens} out"
+          f" | Cache: {cache_write_tokens} written / {cache_read_tokens} read")
+
+    # A response cut off at max_tokens can carry a partial tool input; saving
+    # it would email a post with an empty caption or hook
+    if response.stop_reason != "tool_use":
+        raise ValueError(f"Claude did not finish the post (stop_reason={response.stop_reason})")
+    post_data = next(b.input for b in response.content if b.type == "tool_use")
+    missing = [k for k in _POST_TOOL["input_schema"]["required"] if not post_data.get(k)]
+    if missing:
+        raise ValueError(f"Claude's post is missing fields: {', '.join(missing)}")
+
+    post_id, approval_token = create_post(
         theme_id=theme["id"],
         theme=theme["theme"],
         hook=post_data.get("hook", ""),
@@ -126,8 +190,7 @@ Please generate a completely revised version that addresses this feedback while
         alt_text=post_data.get("alt_text", ""),
         image_prompt=post_data.get("image_prompt", ""),
         cta=post_data.get("cta", ""),
-        approval_token=approval_token,
-        metadata=json.dumps(usage_info),
+        metadata=usage_info,
     )
 
     return {
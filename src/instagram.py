@@ -1,5 +1,6 @@
 """Instagram Graph API publisher for posting approved content."""
 
+import atexit
 import time
 
 import httpx
@@ -8,6 +9,15 @@ from .config import get_settings
 
 GRAPH_API_BASE = "https://graph.instagram.com/v24.0"
 
+# One pooled HTTP/2 client so the container, status and publish calls reuse
+# the same TLS connection instead of handshaking per request.
+_client = httpx.Client(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=4),
+)
+atexit.register(_client.close)
+
 
 class InstagramPublishError(Exception):
     """Raised when Instagram publishing fails."""
@@ -19,7 +29,9 @@ def publish_post(caption: str, hashtags: str, image_url: str | None = None) -> s
     Publish a post to Instagram via Graph API.
     
     For now, this supports text posts with images (Instagram requires an image).
-    The image_url must be a publicly accessible URL.
+    The image_url must be a publicly accessible URL: image containers are
+    always fetched by Meta from a URL, and the Graph API has no multipart or
+    byte upload for them (resumable uploads exist only for video/reels).
     
     Args:
         caption: The post caption text
@@ -58,52 +70,54 @@ def publish_post(caption: str, hashtags: str, image_url: str | None = None) -> s
         "access_token": token,
     }
 
-    with httpx.Client(timeout=30) as client:
-        resp = client.post(container_url, data=container_payload)
-        resp.raise_for_status()
-        container_data = resp.json()
+    resp = _client.post(container_url, data=container_payload)
+    resp.raise_for_status()
+    container_data = resp.json()
 
-        if "id" not in container_data:
-            raise InstagramPublishError(
-                f"Failed to create media container: {container_data}"
-            )
+    if "id" not in container_data:
+        raise InstagramPublishError(
+            f"Failed to create media container: {container_data}"
+        )
 
-        container_id = container_data["id"]
-        print(f"📦 Media container created: {container_id}")
+    container_id = container_data["id"]
+    print(f"📦 Media container created: {container_id}")
 
-        # Step 2: Wait for container to be ready (Instagram processes the image)
-        _wait_for_container(client, container_id, token)
+    # Step 2: Wait for container to be ready (Instagram processes the image)
+    _wait_for_container(container_id, token)
 
-        # Step 3: Publish the container
-        publish_url = f"{GRAPH_API_BASE}/{account_id}/media_publish"
-        publish_payload = {
-            "creation_id": container_id,
-            "access_token": token,
-        }
+    # Step 3: Publish the container
+    publish_url = f"{GRAPH_API_BASE}/{account_id}/media_publish"
+    publish_payload = {
+        "creation_id": container_id,
+        "access_token": token,
+    }
 
-        resp = client.post(publish_url, data=publish_payload)
-        resp.raise_for_status()
-        publish_data = resp.json()
+    resp = _client.post(publish_url, data=publish_payload)
+    resp.raise_for_status()
+    publish_data = resp.json()
 
-        if "id" not in publish_data:
-            raise InstagramPublishError(
-                f"Failed to publish post: {publish_data}"
-            )
+    if "id" not in publish_data:
+        raise InstagramPublishError(
+            f"Failed to publish post: {publish_data}"
+        )
+
+    post_id = publish_data["id"]
+    print(f"✅ Published to Instagram! Post ID: {post_id}")
+    return post_id
 
-        post_id = publish_data["id"]
-        print(f"✅ Published to Instagram! Post ID: {post_id}")
-        return post_id
 
+def _wait_for_container(container_id: str, token: str, max_attempts: int = 12):
+    """Wait for Instagram to finish processing the media container.
+
+    Polls with exponential backoff (0.5s, 1s, 2s, then every 3s), so images
+    that are ready quickly publish sooner while keeping a ~30s budget.
+    """
+    status_url = f"{GRAPH_API_BASE}/{container_id}"
+    params = {"fields": "status_code", "access_token": token}
+    delay = 0.5
 
-def _wait_for_container(
-    client: httpx.Client, container_id: str, token: str, max_attempts: int = 10
-):
-    """Wait for Instagram to finish processing the media container."""
     for attempt in range(max_attempts):
-        resp = client.get(
-            f"{GRAPH_API_BASE}/{container_id}",
-            params={"fields": "status_code", "access_token": token},
-        )
+        resp = _client.get(status_url, params=params)
         data = resp.json()
         status = data.get("status_code")
 
@@ -115,7 +129,8 @@ def _wait_for_container(
             )
 
         print(f"⏳ Waiting for media processing... (attempt {attempt + 1}/{max_attempts})")
-        time.sleep(3)
+        time.sleep(delay)
+        delay = min(delay * 2, 3.0)
 
     raise InstagramPublishError("Media processing timed out")
 
@@ -128,21 +143,21 @@ def validate_credentials() -> bool:
         return False
 
     try:
-        with httpx.Client(timeout=10) as client:
-            resp = client.get(
-                f"{GRAPH_API_BASE}/{settings.instagram_account_id}",
-                params={
-                    "fields": "id,username",
-                    "access_token": settings.instagram_access_token,
-                },
-            )
-            data = resp.json()
-            if "username" in data:
-                print(f"✅ Instagram connected: @{data['username']}")
-                return True
-            else:
-                print(f"❌ Instagram validation failed: {data}")
-                return False
+        resp = _client.get(
+            f"{GRAPH_API_BASE}/{settings.instagram_account_id}",
+            params={
+                "fields": "id,username",
+                "access_token": settings.instagram_access_token,
+            },
+            timeout=10,
+        )
+        data = resp.json()
+        if "username" in data:
+            print(f"✅ Instagram connected: @{data['username']}")
+            return True
+        else:
+            print(f"❌ Instagram validation failed: {data}")
+            return False
     except Exception as e:
         print(f"❌ Instagram validation error: {e}")
         return False
@@ -6,8 +6,10 @@ Generates a post via Claude API and sends an approval email to Nitesh.
 """
 
 import threading
+from datetime import datetime, timedelta, timezone
 
-from apscheduler.schedulers.blocking import BlockingScheduler
+import anthropic
+from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from .config import get_settings
@@ -15,8 +17,15 @@ from .generator import generate_post
 from .emailer import send_approval_email
 
 
-def daily_generate_and_email():
-    """Generate a new post and send it for approval."""
+RETRY_DELAY_MINUTES = 15
+
+
+def daily_generate_and_email(scheduler: BackgroundScheduler | None = None, retry: bool = True):
+    """Generate a new post and send it for approval.
+
+    If the Claude API call fails and a scheduler is given, a single retry is
+    scheduled RETRY_DELAY_MINUTES later instead of skipping the day.
+    """
     print("\n🧘 Daily generation triggered...")
 
     try:
@@ -28,6 +37,21 @@ def daily_generate_and_email():
         send_approval_email(post_data)
         print(f"📧 Approval email sent for post #{post_data['post_id']}")
 
+    except anthropic.APIError as e:
+        print(f"❌ Daily generation failed (Claude API): {e}")
+        if scheduler is not None and retry:
+            run_date = datetime.now(timezone.utc) + timedelta(minutes=RETRY_DELAY_MINUTES)
+            scheduler.add_job(
+                daily_generate_and_email,
+                trigger="date",
+                run_date=run_date,
+                kwargs={"scheduler": scheduler, "retry": False},
+                id="daily_post_generation_retry",
+                name="Retry daily mindfulness post",
+                replace_existing=True,
+            )
+            print(f"🔁 Retrying in {RETRY_DELAY_MINUTES} minutes")
+
     except Exception as e:
         print(f"❌ Daily generation failed: {e}")
         # In production, you'd want to send an error notification here
@@ -35,10 +59,10 @@ def daily_generate_and_email():
         traceback.print_exc()
 
 
-def start_scheduler():
-    """Start the APScheduler with the configured schedule."""
+def create_scheduler() -> BackgroundScheduler:
+    """Build a background scheduler with the daily generation job registered."""
     settings = get_settings()
-    scheduler = BlockingScheduler()
+    scheduler = BackgroundScheduler()
 
     trigger = CronTrigger(
         hour=settings.post_generation_hour,
@@ -49,10 +73,32 @@ def start_scheduler():
     scheduler.add_job(
         daily_generate_and_email,
         trigger=trigger,
+        kwargs={"scheduler": scheduler},
         id="daily_post_generation",
         name="Generate daily mindfulness post",
         replace_existing=True,
     )
+    return scheduler
+
+
+def start_background_scheduler() -> BackgroundScheduler:
+    """Start the scheduler in a background thread and return it for shutdown."""
+    settings = get_settings()
+    scheduler = create_scheduler()
+    scheduler.start()
+    print(
+        f"⏰ Background scheduler started! Posts at "
+        f"{settings.post_generation_hour:02d}:{settings.post_generation_minute:02d} "
+        f"({settings.timezone})"
+    )
+    return scheduler
+
+
+def start_scheduler():
+    """Run the scheduler in the foreground (local dev: python -m src.scheduler)."""
+    settings = get_settings()
+    scheduler = create_scheduler()
+    scheduler.start()
 
     print(
         f"⏰ Scheduler started! Posts will be generated daily at "
@@ -62,8 +108,9 @@ def start_scheduler():
     print("Press Ctrl+C to stop.\n")
 
     try:
-        scheduler.start()
+        threading.Event().wait()
     except (KeyboardInterrupt, SystemExit):
+        scheduler.shutdown()
         print("\n⏹️ Scheduler stopped.")
 
 
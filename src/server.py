@@ -2,34 +2,170 @@
 FastAPI server for the approval workflow.
 
 Endpoints:
-- GET /approve/{token}   — Approve and publish a post
+- GET /approve/{token}   — Approve a post and publish it in the background
 - GET /reject/{token}    — Reject a post
 - GET /preview/{token}   — Preview a post in browser
 - GET /dashboard         — View recent posts and their statuses
 - POST /generate         — Trigger manual post generation (API key protected)
+
+Handlers that touch the database, Claude, Resend or Instagram are plain
+``def`` functions: all of those clients are blocking, so FastAPI runs the
+handlers in its threadpool instead of stalling the event loop.
 """
+import hashlib
+import hmac
 import os
+import re
 from contextlib import asynccontextmanager
+from datetime import timedelta
+from pathlib import Path
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import BackgroundTasks, FastAPI, Form, HTTPException, Request, Response
 from fastapi.responses import HTMLResponse
-import json
+from jinja2 import Environment, FileSystemLoader
+from markupsafe import Markup
+from pydantic import BaseModel
 from .config import get_settings
 from .database import (
+    claim_post_approval,
+    get_post,
     get_post_by_token,
+    get_post_status_by_token,
     get_recent_posts,
     update_post_status,
     PostStatus,
 )
-from .instagram import publish_post, InstagramPublishError
+from .emailer import send_approval_email
+from .generator import generate_post
+from .instagram import publish_post
+from .scheduler import start_background_scheduler
+from .tokens import signing_enabled
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+_STYLE_BLOCK = re.compile(r"(<style>)(.*?)(</style>)", re.S)
+_CSS_PUNCT_SPACE = re.compile(r"\s*([{};,])\s*")
+_INTER_TAG_SPACE = re.compile(r">\s+<")
+
+
+def _minify_css(match: re.Match) -> str:
+    css = _CSS_PUNCT_SPACE.sub(r"\1", " ".join(match.group(2).split()))
+    return match.group(1) + css + match.group(3)
+
+
+class _MinifyingLoader(FileSystemLoader):
+    """Strip indentation and CSS whitespace from page templates as they load.
+
+    Only whitespace inside ``<style>`` and between tags is collapsed, so text
+    content (captions rendered with ``white-space: pre-line``) is untouched.
+    """
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        source = _STYLE_BLOCK.sub(_minify_css, source)
+        source = _INTER_TAG_SPACE.sub("> <", source)
+        return source.strip(), filename, uptodate
+
+
+# Page templates are minified and compiled once and kept; autoescape covers
+# post fields and reviewer feedback rendered into the pages.
+_templates = Environment(
+    loader=_MinifyingLoader(TEMPLATES_DIR),
+    autoescape=True,
+    auto_reload=False,
+    cache_size=-1,
+)
+
+# Settings are fixed for the life of the process, so derive these once
+_BASE_URL = get_settings().server_base_url.rstrip("/")
+
+# Built once; compared in constant time so /generate doesn't leak the key
+_EXPECTED_AUTH = f"Bearer {get_settings().secret_key}".encode()
+
+_STATUS_BADGE = {
+    PostStatus.PENDING_APPROVAL: ("🟡 Pending Review", "#f57c00"),
+    PostStatus.APPROVED: ("🟢 Approved", "#2e7d32"),
+    PostStatus.PUBLISHED: ("✅ Published", "#1565c0"),
+    PostStatus.REJECTED: ("🔴 Rejected", "#c62828"),
+    PostStatus.FAILED: ("❌ Failed", "#c62828"),
+}
+_DEFAULT_BADGE = ("⚪ Draft", "#999")
+
+# Result-page messages that include post data; format_map escapes the values
+_PUBLISHING_MSG = Markup(
+    "The post has been approved and is being published to Instagram.<br><br>"
+    "<em>Theme: {theme}</em><br><br>"
+    "Check the dashboard in a moment to see the result."
+)
+_REJECTED_MSG = Markup(
+    "The post has been rejected. A new post will be generated in the next cycle.<br><br>"
+    "<em>Rejected theme: {theme}</em>"
+)
+_REVISED_MSG = Markup(
+    "Claude has regenerated the post based on your feedback:<br><br>"
+    "<em>\"{feedback}\"</em><br><br>"
+    "A new approval email has been sent. Check your inbox!"
+)
+
+# Statuses that stop an approve/reject link, mapped to the (title, message,
+# color) page shown instead
+_APPROVE_GUARDS = {
+    PostStatus.PUBLISHED: (
+        "Already Published ✅",
+        "This post has already been published to Instagram.",
+        "#2e7d32",
+    ),
+    PostStatus.REJECTED: (
+        "Previously Rejected",
+        "This post was already rejected. Generate a new one if needed.",
+        "#f57c00",
+    ),
+    PostStatus.APPROVED: (
+        "Already Approved",
+        "This post is already being published. Check the dashboard for the result.",
+        "#2e7d32",
+    ),
+}
+_CANNOT_REJECT = ("Cannot Reject", "This post has already been approved/published.", "#f57c00")
+_REJECT_GUARDS = {
+    PostStatus.PUBLISHED: _CANNOT_REJECT,
+    PostStatus.APPROVED: _CANNOT_REJECT,
+}
+
+# The states a post may be claimed from; checked in the UPDATE itself so two
+# simultaneous clicks can't both win
+_APPROVABLE = tuple(s for s in PostStatus if s not in _APPROVE_GUARDS)
+_REJECTABLE = tuple(s for s in PostStatus if s not in _REJECT_GUARDS)
+
+# Well past publish_post's worst case (~30s of container polling plus a few
+# 30s HTTP timeouts); an approval older than this lost its publish task
+_PUBLISH_STALE_AFTER = timedelta(minutes=10)
+
+# Posts in these states never change again, so their previews can be cached
+# (failed posts can still be approved again, so they are not in here)
+_TERMINAL_STATUSES = {PostStatus.PUBLISHED, PostStatus.REJECTED}
+
+_STATUS_EMOJI = {
+    PostStatus.PENDING_APPROVAL: "🟡",
+    PostStatus.APPROVED: "🟢",
+    PostStatus.PUBLISHED: "✅",
+    PostStatus.REJECTED: "🔴",
+    PostStatus.FAILED: "❌",
+    PostStatus.DRAFT: "⚪",
+}
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Start scheduler on startup, clean up on shutdown."""
-    if os.environ.get("ENABLE_SCHEDULER", "true").lower() == "true":
-        start_background_scheduler()
+    if not signing_enabled():
+        print("⚠️  SECRET_KEY is still a placeholder — approval links use random stored tokens")
+    scheduler = None
+    if get_settings().enable_scheduler:
+        scheduler = start_background_scheduler()
     yield
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
 
 
 app = FastAPI(
@@ -44,31 +180,36 @@ app = FastAPI(
 # ─── Approval ────────────────────────────────────────────────────────────────
 
 @app.get("/approve/{token}")
-async def approve_post(token: str):
-    """Approve a post and trigger Instagram publishing."""
-    post = get_post_by_token(token)
-    if not post:
+def approve_post(token: str, background_tasks: BackgroundTasks):
+    """Approve a post and publish it to Instagram after the response is sent."""
+    found = get_post_status_by_token(token)
+    if not found:
         raise HTTPException(status_code=404, detail="Post not found")
+    post_id, status, theme = found
 
-    if post["status"] == PostStatus.PUBLISHED:
-        return HTMLResponse(_result_page(
-            "Already Published ✅",
-            "This post has already been published to Instagram.",
-            "#2e7d32",
-        ))
+    # Approved posts go on to the claim, which takes over stale approvals
+    guard = _APPROVE_GUARDS.get(status)
+    if guard and status != PostStatus.APPROVED:
+        return HTMLResponse(_result_page(*guard))
 
-    if post["status"] == PostStatus.REJECTED:
-        return HTMLResponse(_result_page(
-            "Previously Rejected",
-            "This post was already rejected. Generate a new one if needed.",
-            "#f57c00",
-        ))
+    # Claim the post; only the request that actually moves it to approved
+    # publishes, so repeat clicks can't post it twice
+    if not claim_post_approval(post_id, _APPROVABLE, stale_after=_PUBLISH_STALE_AFTER):
+        return HTMLResponse(_result_page(*_APPROVE_GUARDS[PostStatus.APPROVED]))
+    background_tasks.add_task(_publish_and_update, post_id)
+
+    return HTMLResponse(_result_page(
+        "Post Approved! 🧘",
+        _PUBLISHING_MSG.format_map({"theme": theme}),
+        "#2e7d32",
+    ))
 
-    # Mark as approved
-    update_post_status(post["id"], PostStatus.APPROVED)
 
-    # Try to publish to Instagram
+def _publish_and_update(post_id: int):
+    """Publish an approved post to Instagram and record the outcome."""
     try:
+        post = get_post(post_id)
+
         # Placeholder image for testing — replace with real image generation later
         placeholder_image = "https://images.unsplash.com/photo-1506126613408-eca07ce68773?w=1080&q=80"
 
@@ -77,53 +218,53 @@ async def approve_post(token: str):
             hashtags=post["hashtags"],
             image_url=placeholder_image,
         )
-        update_post_status(post["id"], PostStatus.PUBLISHED, instagram_post_id=instagram_post_id)
-
-        return HTMLResponse(_result_page(
-            "Post Published! 🧘",
-            f"The post has been approved and published to Instagram!<br><br>"
-            f"<em>Theme: {post['theme']}</em><br>"
-            f"<em>Instagram Post ID: {instagram_post_id}</em>",
-            "#2e7d32",
-        ))
-
-    except InstagramPublishError as e:
-        update_post_status(post["id"], PostStatus.FAILED)
-        return HTMLResponse(_result_page(
-            "Publishing Failed ❌",
-            f"The post was approved but publishing failed: {e}<br>Please try again or publish manually.",
-            "#c62828",
-        ))
+    except Exception as e:
+        # Nobody is waiting on this response, so record the failure on the
+        # post rather than leaving it stuck as approved
+        print(f"❌ Publishing post #{post_id} failed: {e}")
+        update_post_status(post_id, PostStatus.FAILED)
+        return
+
+    # Outside the try: the post is live now, so a failed write here must not
+    # mark it FAILED (which would let it be approved and published again)
+    try:
+        update_post_status(post_id, PostStatus.PUBLISHED, instagram_post_id=instagram_post_id)
+    except Exception as e:
+        print(f"❌ Post #{post_id} is live on Instagram ({instagram_post_id}) but saving that failed: {e}")
+        raise
 
 
 # ─── Rejection ───────────────────────────────────────────────────────────────
 
 @app.get("/reject/{token}")
-async def reject_post(token: str):
+def reject_post(token: str):
     """Reject a post."""
-    post = get_post_by_token(token)
-    if not post:
+    found = get_post_status_by_token(token)
+    if not found:
         raise HTTPException(status_code=404, detail="Post not found")
-
-    if post["status"] in (PostStatus.PUBLISHED, PostStatus.APPROVED):
-        return HTMLResponse(_result_page(
-            "Cannot Reject",
-            "This post has already been approved/published.",
-            "#f57c00",
-        ))
-
-    update_post_status(post["id"], PostStatus.REJECTED, rejection_reason="Rejected via email")
+    post_id, status, theme = found
+
+    guard = _REJECT_GUARDS.get(status)
+    if guard:
+        return HTMLResponse(_result_page(*guard))
+
+    if not update_post_status(
+        post_id,
+        PostStatus.REJECTED,
+        rejection_reason="Rejected via email",
+        from_statuses=_REJECTABLE,
+    ):
+        return HTMLResponse(_result_page(*_CANNOT_REJECT))
     return HTMLResponse(_result_page(
         "Post Rejected",
-        "The post has been rejected. A new post will be generated in the next cycle.<br><br>"
-        f"<em>Rejected theme: {post['theme']}</em>",
+        _REJECTED_MSG.format_map({"theme": theme}),
         "#c62828",
     ))
 
 # ─── Feedback & Revision ─────────────────────────────────────────────────────
 
 @app.get("/revise/{token}")
-async def revise_form(token: str):
+def revise_form(token: str):
     """Show a feedback form for the post."""
     post = get_post_by_token(token)
     if not post:
@@ -136,74 +277,18 @@ async def revise_form(token: str):
             "#f57c00",
         ))
 
-    settings = get_settings()
-    base = settings.server_base_url.rstrip("/")
-
-    html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Revise Post — Mindful Poster</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ font-family: -apple-system, sans-serif; background: #f5f0eb; padding: 20px; }}
-        .container {{ max-width: 540px; margin: 0 auto; }}
-        h1 {{ color: #1a3a2a; font-size: 20px; text-align: center; margin-bottom: 8px; }}
-        .subtitle {{ text-align: center; color: #888; font-size: 13px; margin-bottom: 24px; }}
-        .original {{ background: white; border-radius: 12px; padding: 20px; margin-bottom: 24px; box-shadow: 0 2px 8px rgba(0,0,0,0.06); }}
-        .original h3 {{ font-size: 14px; color: #1a3a2a; margin-bottom: 8px; }}
-        .original .hook {{ font-style: italic; color: #555; font-size: 15px; margin-bottom: 12px; }}
-        .original .caption {{ font-size: 13px; color: #666; line-height: 1.6; white-space: pre-line; max-height: 150px; overflow-y: auto; }}
-        .feedback-form {{ background: white; border-radius: 12px; padding: 24px; box-shadow: 0 2px 8px rgba(0,0,0,0.06); }}
-        .feedback-form h3 {{ font-size: 14px; color: #1a3a2a; margin-bottom: 12px; }}
-        textarea {{ width: 100%; height: 120px; border: 2px solid #e0d8cf; border-radius: 8px; padding: 12px; font-family: inherit; font-size: 14px; resize: vertical; }}
-        textarea:focus {{ outline: none; border-color: #3a7a52; }}
-        .hint {{ font-size: 12px; color: #999; margin-top: 8px; margin-bottom: 16px; }}
-        .actions {{ display: flex; gap: 12px; }}
-        .btn {{ flex: 1; padding: 12px; border-radius: 8px; font-size: 14px; font-weight: 600; text-align: center; cursor: pointer; border: none; text-decoration: none; display: block; }}
-        .btn-revise {{ background: #1a3a2a; color: white; }}
-        .btn-revise:hover {{ background: #2a5a3a; }}
-        .btn-reject {{ background: #f5f0eb; color: #c62828; border: 1px solid #e0d8cf; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>✏️ Revise This Post</h1>
-        <p class="subtitle">📌 {post['theme']}</p>
-
-        <div class="original">
-            <h3>Current Post</h3>
-            <p class="hook">"{post['hook']}"</p>
-            <p class="caption">{post['caption']}</p>
-        </div>
-
-        <div class="feedback-form">
-            <h3>Your Feedback for Claude</h3>
-            <form action="{base}/revise/{token}" method="post">
-                <textarea name="feedback" placeholder="e.g. Make it more relatable to exam stress. Less philosophical, more conversational. Add a breathing exercise at the end."></textarea>
-                <p class="hint">Be specific — Claude will regenerate the post based on your feedback while keeping the same theme.</p>
-                <div class="actions">
-                    <button type="submit" class="btn btn-revise">🔄 Regenerate Post</button>
-                    <a href="{base}/reject/{token}" class="btn btn-reject">🗑️ Just Reject</a>
-                </div>
-            </form>
-        </div>
-    </div>
-</body>
-</html>"""
+    html = _templates.get_template("revise.html").render(post=post, base=_BASE_URL, token=token)
     return HTMLResponse(html)
 
 
 @app.post("/revise/{token}")
-async def revise_post(token: str, request: Request):
+def revise_post(token: str, feedback: str = Form("")):
     """Regenerate a post based on feedback."""
     post = get_post_by_token(token)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    form = await request.form()
-    feedback = form.get("feedback", "").strip()
+    feedback = feedback.strip()
 
     if not feedback:
         return HTMLResponse(_result_page(
@@ -212,13 +297,17 @@ async def revise_post(token: str, request: Request):
             "#f57c00",
         ))
 
-    # Mark old post as rejected with feedback
-    update_post_status(post["id"], PostStatus.REJECTED, rejection_reason=f"Revision requested: {feedback}")
+    # Mark old post as rejected with feedback, unless it was approved or
+    # published since the form was opened
+    if not update_post_status(
+        post["id"],
+        PostStatus.REJECTED,
+        rejection_reason=f"Revision requested: {feedback}",
+        from_statuses=_REJECTABLE,
+    ):
+        return HTMLResponse(_result_page(*_CANNOT_REJECT))
 
     # Regenerate with feedback
-    from .generator import generate_post
-    from .emailer import send_approval_email
-
     post_data = generate_post(
         force_theme_id=post["theme_id"],
         revision_of=post,
@@ -228,9 +317,7 @@ async def revise_post(token: str, request: Request):
 
     return HTMLResponse(_result_page(
         "Revised Post Generated! ✏️",
-        f"Claude has regenerated the post based on your feedback:<br><br>"
-        f"<em>\"{feedback}\"</em><br><br>"
-        f"A new approval email has been sent. Check your inbox!",
+        _REVISED_MSG.format_map({"feedback": feedback}),
         "#1a3a2a",
     ))
 
@@ -238,250 +325,114 @@ async def revise_post(token: str, request: Request):
 # ─── Preview ─────────────────────────────────────────────────────────────────
 
 @app.get("/preview/{token}")
-async def preview_post(token: str):
+def preview_post(token: str, request: Request):
     """Preview a post in the browser (Instagram card style)."""
     post = get_post_by_token(token)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    settings = get_settings()
-    base = settings.server_base_url.rstrip("/")
-
-    status_badge = {
-        PostStatus.PENDING_APPROVAL: ("🟡 Pending Review", "#f57c00"),
-        PostStatus.APPROVED: ("🟢 Approved", "#2e7d32"),
-        PostStatus.PUBLISHED: ("✅ Published", "#1565c0"),
-        PostStatus.REJECTED: ("🔴 Rejected", "#c62828"),
-        PostStatus.FAILED: ("❌ Failed", "#c62828"),
-    }.get(post["status"], ("⚪ Draft", "#999"))
-
-    html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Post Preview — The Mindful Initiative</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; background: #f5f0eb; padding: 20px; }}
-        .container {{ max-width: 500px; margin: 0 auto; }}
-        .header {{ text-align: center; padding: 24px 0; }}
-        .header h1 {{ color: #1a3a2a; font-size: 18px; letter-spacing: 1px; }}
-        .status {{ display: inline-block; padding: 4px 12px; border-radius: 12px; font-size: 12px; font-weight: 600; color: white; background: {status_badge[1]}; margin: 8px 0; }}
-        .card {{ background: white; border-radius: 12px; overflow: hidden; box-shadow: 0 2px 12px rgba(0,0,0,0.08); }}
-        .card-header {{ padding: 12px 16px; border-bottom: 1px solid #efefef; font-weight: 600; font-size: 14px; }}
-        .card-image {{ background: linear-gradient(135deg, #1a3a2a, #3a7a52); padding: 48px 24px; text-align: center; }}
-        .card-image p {{ color: #e8dfd6; font-size: 20px; font-style: italic; line-height: 1.5; }}
-        .card-image .suggestion {{ color: #a8c4b0; font-size: 11px; margin-top: 16px; letter-spacing: 0.5px; }}
-        .card-body {{ padding: 16px; }}
-        .caption {{ font-size: 14px; line-height: 1.7; color: #262626; white-space: pre-line; }}
-        .hashtags {{ color: #0095f6; font-size: 13px; margin-top: 12px; }}
-        .meta {{ padding: 16px; background: #fafafa; border-top: 1px solid #efefef; font-size: 12px; color: #888; }}
-        .actions {{ text-align: center; padding: 24px 0; }}
-        .btn {{ display: inline-block; padding: 12px 32px; border-radius: 8px; font-size: 14px; font-weight: 600; text-decoration: none; margin: 4px; }}
-        .btn-approve {{ background: #2e7d32; color: white; }}
-        .btn-reject {{ background: #c62828; color: white; }}
-        .btn-revise {{ background: #f57c00; color: white; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🧘 THE MINDFUL INITIATIVE</h1>
-            <span class="status">{status_badge[0]}</span>
-            <p style="font-size: 13px; color: #888; margin-top: 8px;">📌 {post['theme']}</p>
-        </div>
-        
-        <div class="card">
-            <div class="card-header">@themindfulinitiative</div>
-            <div class="card-image">
-                <p>"{post['hook']}"</p>
-                <p class="suggestion">🖼️ {post['image_prompt']}</p>
-            </div>
-            <div class="card-body">
-                <p class="caption">{post['caption']}</p>
-                <p class="hashtags">{post['hashtags']}</p>
-            </div>
-            <div class="meta">
-                <p>💡 CTA: {post['cta']}</p>
-                <p style="margin-top: 4px;">♿ Alt text: {post['alt_text']}</p>
-                <p style="margin-top: 4px;">📅 Created: {post['created_at']}</p>
-            </div>
-        </div>
-        
-        {"" if post["status"] != PostStatus.PENDING_APPROVAL else f'''
-        <div class="actions">
-            <a href="{base}/approve/{token}" class="btn btn-approve">✅ Approve & Publish</a>
-            <a href="{base}/revise/{token}" class="btn btn-revise">✏️ Revise</a>
-            <a href="{base}/reject/{token}" class="btn btn-reject">❌ Reject</a>
-        </div>
-        '''}
-    </div>
-</body>
-</html>"""
-    return HTMLResponse(html)
+    etag = _preview_etag(post)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            # private: the URL carries a secret token, so shared caches keep out
+            "private, max-age=86400"
+            if post["status"] in _TERMINAL_STATUSES
+            else "private, no-cache"
+        ),
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (t.strip().removeprefix("W/") for t in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    status_label, status_color = _STATUS_BADGE.get(post["status"], _DEFAULT_BADGE)
+
+    html = _templates.get_template("preview.html").render(
+        post=post,
+        base=_BASE_URL,
+        token=token,
+        status_label=status_label,
+        status_color=status_color,
+        show_actions=post["status"] == PostStatus.PENDING_APPROVAL,
+    )
+    return HTMLResponse(html, headers=headers)
 
 
 # ─── Dashboard ───────────────────────────────────────────────────────────────
 
 @app.get("/dashboard")
-async def dashboard():
+def dashboard():
     """Simple dashboard showing recent posts."""
     posts = get_recent_posts(limit=20)
-    settings = get_settings()
-    base = settings.server_base_url.rstrip("/")
-
-    rows = ""
-    for p in posts:
-        try:
-            meta = json.loads(p.get("metadata", "{}") or "{}")
-            cost_inr = meta.get("cost_inr", "—")
-            cost_str = f"₹{cost_inr}" if cost_inr != "—" else "—"
-        except (json.JSONDecodeError, TypeError):
-            cost_str = "—"
-        status_emoji = {
-            "pending_approval": "🟡",
-            "approved": "🟢",
-            "published": "✅",
-            "rejected": "🔴",
-            "failed": "❌",
-            "draft": "⚪",
-        }.get(p["status"], "⚪")
-
-        rows += f"""
-        <tr>
-            <td>{p['id']}</td>
-            <td>{status_emoji} {p['status']}</td>
-            <td style="max-width: 200px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;">{p['theme']}</td>
-            <td style="max-width: 250px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;">{p['hook']}</td>
-            <td>{cost_str}</td>
-            <td>{p['created_at'][:10]}</td>
-            <td><a href="{base}/preview/{p['approval_token']}">Preview</a></td>
-        </tr>"""
-
-    html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>Dashboard — Mindful Poster</title>
-    <style>
-        body {{ font-family: -apple-system, sans-serif; padding: 32px; background: #f5f0eb; }}
-        h1 {{ color: #1a3a2a; margin-bottom: 24px; }}
-        table {{ width: 100%; border-collapse: collapse; background: white; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.06); }}
-        th {{ background: #1a3a2a; color: white; padding: 12px; text-align: left; font-size: 13px; }}
-        td {{ padding: 10px 12px; border-bottom: 1px solid #eee; font-size: 13px; }}
-        tr:hover {{ background: #f9f6f2; }}
-        a {{ color: #0095f6; }}
-    </style>
-</head>
-<body>
-    <h1>🧘 Mindful Poster — Dashboard</h1>
-    <table>
-        <thead>
-            <tr><th>#</th><th>Status</th><th>Theme</th><th>Hook</th><th>Cost</th><th>Date</th><th>Preview</th></tr>
-        </thead>
-        <tbody>{rows if rows else '<tr><td colspan="7" style="text-align:center; padding: 24px; color: #999;">No posts yet. Generate your first post!</td></tr>'}</tbody>
-    </table>
-</body>
-</html>"""
+    # The rows are built by the template loop rather than by string concatenation
+    html = _templates.get_template("dashboard.html").render(
+        posts=posts, base=_BASE_URL, status_emoji=_STATUS_EMOJI
+    )
     return HTMLResponse(html)
 
 
 # ─── Manual Generation Trigger ───────────────────────────────────────────────
 
+# JSON endpoints declare their return types, which lets FastAPI serialise
+# them straight to bytes with Pydantic's Rust encoder.
+
+class GenerateResponse(BaseModel):
+    message: str
+    post_id: int
+    theme: str
+    hook: str
+
+
 @app.post("/generate")
-async def trigger_generation(request: Request):
+def trigger_generation(request: Request) -> GenerateResponse:
     """Manually trigger a new post generation. Protected by API key."""
-    settings = get_settings()
-    
     auth = request.headers.get("Authorization", "")
-    if auth != f"Bearer {settings.secret_key}":
+    if not hmac.compare_digest(auth.encode("latin-1", "ignore"), _EXPECTED_AUTH):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    from .generator import generate_post
-    from .emailer import send_approval_email
-
     post_data = generate_post()
     send_approval_email(post_data)
 
-    return {
-        "message": "Post generated and approval email sent",
-        "post_id": post_data["post_id"],
-        "theme": post_data.get("theme", ""),
-        "hook": post_data.get("hook", ""),
-    }
+    return GenerateResponse(
+        message="Post generated and approval email sent",
+        post_id=post_data["post_id"],
+        theme=post_data.get("theme", ""),
+        hook=post_data.get("hook", ""),
+    )
 
 
 # ─── Health Check ────────────────────────────────────────────────────────────
 
 @app.get("/health")
-async def health():
+async def health() -> dict[str, str]:
     return {"status": "ok", "service": "mindful-poster"}
 
 
 # ─── Helpers ─────────────────────────────────────────────────────────────────
 
-def _result_page(title: str, message: str, color: str) -> str:
-    """Generate a simple result page HTML."""
-    return f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} — Mindful Poster</title>
-    <style>
-        body {{ font-family: -apple-system, sans-serif; background: #f5f0eb; display: flex; justify-content: center; align-items: center; min-height: 100vh; }}
-        .card {{ background: white; border-radius: 16px; padding: 48px; max-width: 480px; text-align: center; box-shadow: 0 4px 24px rgba(0,0,0,0.08); }}
-        h1 {{ color: {color}; font-size: 24px; margin-bottom: 16px; }}
-        p {{ color: #555; line-height: 1.6; font-size: 15px; }}
-        a {{ color: #0095f6; margin-top: 16px; display: inline-block; }}
-    </style>
-</head>
-<body>
-    <div class="card">
-        <h1>{title}</h1>
-        <p>{message}</p>
-        <a href="/dashboard">← Back to Dashboard</a>
-    </div>
-</body>
-</html>"""
+def _preview_etag(post: dict) -> str:
+    """Build a strong ETag from the fields that change a post's preview."""
+    version = f"{post['id']}:{post['status']}:{post['approved_at']}:{post['published_at']}"
+    return f'"{hashlib.blake2s(version.encode(), digest_size=8).hexdigest()}"'
 
 
-# ─── Entry Point ─────────────────────────────────────────────────────────────
-
-def start_background_scheduler():
-    """Start the post generation scheduler in the background."""
-    from apscheduler.schedulers.background import BackgroundScheduler
-    from apscheduler.triggers.cron import CronTrigger
-    from .scheduler import daily_generate_and_email
-
-    settings = get_settings()
-    scheduler = BackgroundScheduler()
-
-    trigger = CronTrigger(
-        hour=settings.post_generation_hour,
-        minute=settings.post_generation_minute,
-        timezone=settings.timezone,
-    )
+def _result_page(title: str, message: str, color: str) -> str:
+    """Generate a simple result page HTML.
 
-    scheduler.add_job(
-        daily_generate_and_email,
-        trigger=trigger,
-        id="daily_post_generation",
-        name="Generate daily mindfulness post",
-        replace_existing=True,
+    The message is escaped unless it is Markup; messages that mix markup
+    with post data are module-level Markup templates filled via format_map.
+    """
+    return _templates.get_template("result.html").render(
+        title=title, message=message, color=color
     )
 
-    scheduler.start()
-    print(
-        f"⏰ Background scheduler started! Posts at "
-        f"{settings.post_generation_hour:02d}:{settings.post_generation_minute:02d} "
-        f"({settings.timezone})"
-    )
 
+# ─── Entry Point ─────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
     settings = get_settings()
     port = int(os.environ.get("PORT", settings.server_port))
-    print(f"🧘 Mindful Poster server starting on port {port}...")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    print(f"🧘 Mindful Poster server starting on port {port} ({settings.workers} worker(s))...")
+    # uvicorn[standard] provides uvloop and httptools, which the default
+    # "auto" loop/http settings pick up when installed
+    uvicorn.run("src.server:app", host="0.0.0.0", port=port, workers=settings.workers)
@@ -96,7 +96,7 @@ Add context-specific ones from:
 
 ## FORMAT
 
-Return the post in this exact JSON structure:
+Return the post by calling the emit_post tool with these fields:
 {
     "hook": "The attention-grabbing first line (shown before 'more' on Instagram)",
     "caption": "The full caption text including the hook as the first line",
@@ -108,6 +108,12 @@ Return the post in this exact JSON structure:
 }
 """
 
+# Normalise once at import: trailing spaces on wrapped lines and the outer
+# blank lines are just bytes sent (and billed) on every generation
+NITESH_STYLE_SYSTEM_PROMPT = "\n".join(
+    line.rstrip() for line in NITESH_STYLE_SYSTEM_PROMPT.strip().splitlines()
+)
+
 CONTENT_GENERATION_PROMPT = """Generate an Instagram post for The Mindful Initiative's "Mindfulness for Teenagers" project.
 
 Theme for this post: {theme}
@@ -121,4 +127,4 @@ Remember:
 - Include a simple practical exercise or reflection question
 - End with an invitation, not an instruction
 
-Return ONLY valid JSON in the format specified. No markdown code fences."""
+Return the post by calling the emit_post tool."""
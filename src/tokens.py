@@ -0,0 +1,54 @@
+"""Signed approval tokens that embed the post ID.
+
+Tokens look like "<post_id>.<signature>", where the signature is an HMAC of
+the post ID keyed with SECRET_KEY. A valid token identifies its post without
+a lookup on the approval_token column.
+
+While SECRET_KEY is still a placeholder, anyone could compute those
+signatures, so posts get random tokens instead and nothing is accepted as
+signed.
+"""
+
+import hashlib
+import hmac
+import secrets
+
+from .config import get_settings
+
+# Example values from .env.example / README; signing with them is no signing
+_PLACEHOLDER_KEYS = {"", "change-this-to-a-random-string", "generate-a-random-string-here"}
+
+
+def _signing_key() -> bytes | None:
+    key = get_settings().secret_key
+    return None if key in _PLACEHOLDER_KEYS else key.encode()
+
+
+def _signature(key: bytes, post_id: int) -> str:
+    return hmac.new(key, str(post_id).encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def signing_enabled() -> bool:
+    """Whether SECRET_KEY is set to something other than a placeholder."""
+    return _signing_key() is not None
+
+
+def new_post_token(post_id: int) -> str:
+    """Build the approval token for a new post (random if signing is disabled)."""
+    key = _signing_key()
+    if key is None:
+        return secrets.token_urlsafe(32)
+    return f"{post_id}.{_signature(key, post_id)}"
+
+
+def verify_post_token(token: str) -> int | None:
+    """Return the post ID if the token carries a valid signature, else None."""
+    key = _signing_key()
+    if key is None:
+        return None
+    post_id, sep, signature = token.partition(".")
+    if not sep or not (post_id.isascii() and post_id.isdigit()) or not signature.isascii():
+        return None
+    if not hmac.compare_digest(signature, _signature(key, int(post_id))):
+        return None
+    return int(post_id)